@@ -1294,7 +1294,7 @@ elif page == "🛠️ Fix Quarantine":
         """)
     
     blob_list = list(quarantine_client.list_blobs())
-    staged_names = [item['original_name'] for item in st.session_state.staged_fixes]
+    staged_names = {item['original_name'] for item in st.session_state.staged_fixes}
     remaining_blobs = [b.name for b in blob_list if b.name not in staged_names]
     
     if not remaining_blobs:
@@ -1,54 +1,89 @@
 import polars as pl
+import io
 import random
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
+# Shared pipeline helpers live one level up
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pipeline.azure_clients import make_blob_service_client, TRANSFER_CONCURRENCY
+
 # --- CONFIGURATION ---
 load_dotenv()
 ACCOUNT_NAME = os.getenv("AZURE_STORAGE_ACCOUNT")
 ACCOUNT_URL = f"https://{ACCOUNT_NAME}.blob.core.windows.net"
-
-print(f"🔌 Connecting to {ACCOUNT_NAME}...")
-credential = DefaultAzureCredential()
-blob_service = BlobServiceClient(ACCOUNT_URL, credential=credential)
-landing_client = blob_service.get_container_client("landing-zone")
+UPLOAD_WORKERS = 8 # Files uploaded at the same time
 
 # --- GENERATOR SETTINGS ---
 WEEKS_TO_GENERATE = 5
 SAMPLES_PER_WEEK = 5
 
-print(f"🚀 Generating data for the past {WEEKS_TO_GENERATE} weeks...")
+# Optional shared-key shortcut for local testing; skips the AAD token exchange.
+# Real environments should keep using the Service Principal / managed identity path.
+CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 
-current_date = datetime.now()
+def get_landing_client():
+    """Connect to Azure and return the landing-zone container client."""
+    print(f"🔌 Connecting to {ACCOUNT_NAME}...")
+    if CONNECTION_STRING:
+        blob_service = make_blob_service_client(UPLOAD_WORKERS, connection_string=CONNECTION_STRING)
+    else:
+        credential = DefaultAzureCredential()
+        blob_service = make_blob_service_client(UPLOAD_WORKERS, account_url=ACCOUNT_URL, credential=credential)
+    return blob_service.get_container_client("landing-zone")
+
+def upload_file(landing_client, filename, df):
+    """Upload one mock CSV to the landing zone."""
+    print(f"   📤 Uploading {filename} to landing-zone ({len(df)} rows)...")
+    # Write CSV bytes straight into a buffer rather than building a str to re-encode
+    csv_buffer = io.BytesIO()
+    df.write_csv(csv_buffer)
+    landing_client.upload_blob(name=filename, data=csv_buffer.getvalue(), overwrite=True, max_concurrency=TRANSFER_CONCURRENCY)
 
-for i in range(WEEKS_TO_GENERATE):
-    # Calculate a date in the past (going back 1 week at a time)
-    week_date = current_date - timedelta(weeks=i)
+def main():
+    landing_client = get_landing_client()
     
-    # Create a filename that looks like an email attachment
-    # e.g., "Lab_Results_2025-11-20.csv"
-    date_str = week_date.strftime('%Y-%m-%d')
-    filename = f"Lab_Results_{date_str}.csv"
+    print(f"🚀 Generating data for the past {WEEKS_TO_GENERATE} weeks...")
     
-    # Generate Mock Data
-    data = {
-        # ID format: TEST-WeekNum-SampleNum
-        'sample_id': [f"TEST-{week_date.isocalendar()[1]}-{x}" for x in range(SAMPLES_PER_WEEK)],
-        'test_date': [date_str for _ in range(SAMPLES_PER_WEEK)],
-        # Sprinkle in some "POS" and maybe a typo ("Positive") to test validation
-        'result': [random.choice(['POS', 'NEG', 'NEG', 'N/A', 'Positive']) for _ in range(SAMPLES_PER_WEEK)],
-        'viral_load': [random.randint(0, 5000) for _ in range(SAMPLES_PER_WEEK)]
-    }
+    current_date = datetime.now()
     
-    # Create Polars DataFrame
-    df = pl.DataFrame(data)
+    # Upload each file in the background while the next one is generated
+    pending = {}
     
-    # Upload to Azure
-    print(f"   📤 Uploading {filename} to landing-zone ({len(df)} rows)...")
-    landing_client.upload_blob(name=filename, data=df.write_csv(), overwrite=True)
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        for i in range(WEEKS_TO_GENERATE):
+            # Calculate a date in the past (going back 1 week at a time)
+            week_date = current_date - timedelta(weeks=i)
+            
+            # Create a filename that looks like an email attachment
+            # e.g., "Lab_Results_2025-11-20.csv"
+            date_str = week_date.strftime('%Y-%m-%d')
+            filename = f"Lab_Results_{date_str}.csv"
+            
+            # Generate Mock Data
+            data = {
+                # ID format: TEST-WeekNum-SampleNum
+                'sample_id': [f"TEST-{week_date.isocalendar()[1]}-{x}" for x in range(SAMPLES_PER_WEEK)],
+                'test_date': [date_str for _ in range(SAMPLES_PER_WEEK)],
+                # Sprinkle in some "POS" and maybe a typo ("Positive") to test validation
+                'result': [random.choice(['POS', 'NEG', 'NEG', 'N/A', 'Positive']) for _ in range(SAMPLES_PER_WEEK)],
+                'viral_load': [random.randint(0, 5000) for _ in range(SAMPLES_PER_WEEK)]
+            }
+            
+            # Create Polars DataFrame
+            pending[filename] = executor.submit(upload_file, landing_client, filename, pl.DataFrame(data))
+    
+    # Surface any upload failure once everything has drained
+    for future in pending.values():
+        future.result()
+    
+    print("\n✅ Success! 5 weeks of data are now waiting in the Landing Zone.")
+    print("   👉 Run the pipeline to process them.")
 
-print("\n✅ Success! 5 weeks of data are now waiting in the Landing Zone.")
-print("   👉 Run the pipeline to process them.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
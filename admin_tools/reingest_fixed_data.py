@@ -1,4 +1,5 @@
 import polars as pl
+import io
 import os
 import shutil
 from datetime import date
@@ -64,7 +65,9 @@ def process_reingest():
                 
                 # Upload to Landing Zone
                 print("   🚀 Uploading to landing-zone...")
-                landing_client.upload_blob(filename, df.write_csv(), overwrite=True)
+                csv_buffer = io.BytesIO()
+                df.write_csv(csv_buffer)
+                landing_client.upload_blob(filename, csv_buffer.getvalue(), overwrite=True)
                 
                 # Delete from Quarantine (Cloud)
                 print("   🗑️  Deleting from Azure quarantine...")
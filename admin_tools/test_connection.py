@@ -16,11 +16,10 @@ def test_cloud():
     account_url = f"https://{account_name}.blob.core.windows.net"
     blob_service = BlobServiceClient(account_url, credential=credential)
     
-    # Try to list containers
-    containers = blob_service.list_containers()
+    # Try to list containers (up to 500 per request instead of the service's default page size)
+    names = [c.name for c in blob_service.list_containers(results_per_page=500)]
     print("Success! I found these containers:")
-    for c in containers:
-        print(f" - {c.name}")
+    print("\n".join(f" - {name}" for name in names))
 
 if __name__ == "__main__":
     test_cloud()
\ No newline at end of file
@@ -1,14 +1,18 @@
 import streamlit as st
 import os
 import io
-import requests
-import pandas as pd
+import csv
+import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
+# Shared pipeline helpers live one level up
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 # --- CONFIGURATION ---
 st.set_page_config(
     page_title="🧬 Data Pipeline: Admin Console",
@@ -25,6 +29,18 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 REPO_OWNER = os.getenv("REPO_OWNER")
 REPO_NAME = os.getenv("REPO_NAME")
 
+# Parallel block transfers for multi-MB CSVs; the HTTP pool is sized to match
+BLOB_MAX_CONCURRENCY = 8
+# Files in flight at once; the shared client sizes its HTTP pool for 8 chunks each
+BLOB_TRANSFER_WORKERS = 8
+# Only fetch the head of a blob for previews
+PREVIEW_BYTES = 128 * 1024
+REPORT_PREVIEW_BYTES = 4 * 1024 * 1024
+# Each run writes one timestamped log file; history only loads the newest ones
+LOG_HISTORY_LIMIT = 500
+# Warn when fewer GitHub API calls than this remain in the hourly window
+GH_RATE_LIMIT_WARN = 100
+
 # --- SESSION STATE ---
 if "staged_fixes" not in st.session_state:
     st.session_state.staged_fixes = []
@@ -51,20 +67,234 @@ if "toast_message" in st.session_state:
     del st.session_state.toast_message
 
 # --- AZURE CONNECTION ---
+CONTAINER_NAMES = ("landing-zone", "quarantine", "data", "logs", "deletion-requests")
+
+def get_credential():
+    """Use the .env service principal directly when present to skip the credential probe chain."""
+    from azure.identity import DefaultAzureCredential, EnvironmentCredential
+    if all(os.getenv(var) for var in ("AZURE_CLIENT_ID", "AZURE_TENANT_ID", "AZURE_CLIENT_SECRET")):
+        return EnvironmentCredential()
+    return DefaultAzureCredential(exclude_interactive_browser_credential=True)
+
+@st.cache_resource
+def get_clients():
+    """Build the service and container clients once per process, not per rerun."""
+    from pipeline.azure_clients import make_blob_service_client
+    credential = get_credential()
+    blob_service = make_blob_service_client(
+        BLOB_TRANSFER_WORKERS,
+        account_url=ACCOUNT_URL,
+        credential=credential,
+        connection_timeout=20,
+        read_timeout=60
+    )
+    return blob_service, {name: blob_service.get_container_client(name) for name in CONTAINER_NAMES}
+
+def connect_azure():
+    """Bind the container clients as globals; deferred until a page that needs Azure is opened."""
+    global blob_service, landing_client, quarantine_client, data_client, logs_client, deletion_client
+    try:
+        blob_service, containers = get_clients()
+        landing_client = containers["landing-zone"]
+        quarantine_client = containers["quarantine"]
+        data_client = containers["data"]
+        logs_client = containers["logs"]
+        deletion_client = containers["deletion-requests"]
+    except Exception as e:
+        st.error(f"Failed to connect to Azure: {e}")
+        st.stop()
+
+# --- GITHUB ACTIONS ---
+def github_token_hash():
+    """Hash of the GitHub token, used to scope cached API responses."""
+    return hashlib.sha256(GITHUB_TOKEN.encode()).hexdigest() if GITHUB_TOKEN else ""
+
 @st.cache_resource
-def get_blob_service():
-    credential = DefaultAzureCredential()
-    return BlobServiceClient(ACCOUNT_URL, credential=credential)
+def gh_session():
+    """Keep-alive session for GitHub API calls, reused across reruns."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github.v3+json"
+    })
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=15, show_spinner=False)
+def fetch_latest_run(owner, repo, workflow_file, token_hash, etag=None):
+    """Fetch the latest run of a workflow as (status_code, payload, etag, rate_remaining).
+
+    The token hash only keys the cache so the token itself is never stored.
+    Sends `etag` as If-None-Match; a 304 (not counted against the rate limit) comes back
+    with no payload. Shared across sessions, so it must not touch st.session_state.
+    """
+    runs_url = f"https://api.github.com/repos/{owner}/{repo}/actions/workflows/{workflow_file}/runs"
+    headers = {"If-None-Match": etag} if etag else {}
+    
+    response = gh_session().get(runs_url, headers=headers, params={"per_page": 1})
+    
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    remaining = int(remaining) if remaining is not None else None
+    
+    if response.status_code == 304:
+        return 304, None, etag, remaining
+    if response.status_code == 200:
+        return 200, response.json(), response.headers.get("ETag"), remaining
+    return response.status_code, response.text, None, remaining
+
+def get_latest_run(workflow_file):
+    """Latest run of a workflow as (status_code, payload), reusing this session's payload on 304."""
+    etags = st.session_state.setdefault("_runs_etag", {})
+    etag, cached_payload = etags.get(workflow_file, (None, None))
+    
+    status_code, payload, new_etag, remaining = fetch_latest_run(
+        REPO_OWNER, REPO_NAME, workflow_file, github_token_hash(), etag
+    )
+    
+    # Remember the rate-limit budget so the status monitors can warn before it runs out
+    if remaining is not None:
+        st.session_state["_gh_rate_remaining"] = remaining
+    
+    if status_code == 304:
+        return 200, cached_payload
+    if status_code == 200:
+        etags[workflow_file] = (new_etag, payload)
+    return status_code, payload
 
-try:
-    blob_service = get_blob_service()
-    landing_client = blob_service.get_container_client("landing-zone")
-    quarantine_client = blob_service.get_container_client("quarantine")
-    data_client = blob_service.get_container_client("data")
-    logs_client = blob_service.get_container_client("logs")
-except Exception as e:
-    st.error(f"Failed to connect to Azure: {e}")
-    st.stop()
+def warn_if_rate_limited():
+    """Show a warning when the GitHub API rate limit is close to exhausted."""
+    remaining = st.session_state.get("_gh_rate_remaining")
+    if remaining is not None and remaining < GH_RATE_LIMIT_WARN:
+        st.warning(f"⚠️ Only {remaining} GitHub API requests left this hour. Status checks may start failing.")
+
+# --- AZURE HELPERS ---
+@st.cache_data(ttl=60, show_spinner=False)
+def list_blobs_cached(container_name):
+    """List (name, etag) for every blob in a container, cached across reruns."""
+    _, containers = get_clients()
+    return [(blob.name, blob.etag) for blob in containers[container_name].list_blobs()]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_report_props(blob_name):
+    """Return (size, last_modified) of a blob in the data container, or None if it is missing."""
+    from azure.core.exceptions import ResourceNotFoundError
+    try:
+        props = data_client.get_blob_client(blob_name).get_blob_properties()
+    except ResourceNotFoundError:
+        return None
+    return props.size, props.last_modified
+
+def clear_storage_caches():
+    """Drop cached listings, logs and report properties after anything changes storage."""
+    list_blobs_cached.clear()
+    load_all_logs.clear()
+    get_report_props.clear()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_all_logs(prefix):
+    """Load the newest LOG_HISTORY_LIMIT logs (Parquet or legacy CSV) whose name starts with prefix, most recent first.
+
+    Returns (log_count, combined_df, errors); log_count counts all matching logs,
+    combined_df is None if no log could be read.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    all_names = sorted((blob.name for blob in logs_client.list_blobs(name_starts_with=prefix)), reverse=True)  # Most recent first
+    # Names embed the run timestamp, so the cap keeps load time flat as history grows
+    log_names = all_names[:LOG_HISTORY_LIMIT]
+    
+    def read_log(name):
+        log_data = logs_client.get_blob_client(name).download_blob().readall()
+        if name.endswith(".parquet"):
+            return pq.read_table(io.BytesIO(log_data))
+        return pacsv.read_csv(io.BytesIO(log_data))
+    
+    all_logs = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = [executor.submit(read_log, name) for name in log_names]
+        for name, future in zip(log_names, futures):
+            try:
+                all_logs.append(future.result())
+            except Exception as e:
+                errors.append(f"Could not read {name}: {e}")
+    
+    if not all_logs:
+        return len(all_names), None, errors
+    
+    # Arrow concat stitches the tables without copying; pandas materializes once.
+    # Permissive promotion unifies older logs with missing columns or coarser timestamps.
+    combined = pa.concat_tables(all_logs, promote_options="permissive").to_pandas()
+    # Parse once here so sorting compares datetimes and pages only need to format
+    combined['execution_timestamp'] = pd.to_datetime(combined['execution_timestamp'], format='ISO8601')
+    combined = combined.sort_values('execution_timestamp', ascending=False)
+    return len(all_names), combined, errors
+
+def read_blob_head(blob_client, length):
+    """Download the first `length` bytes of a blob, trimmed to the last complete line."""
+    data = blob_client.download_blob(offset=0, length=length).readall()
+    if len(data) == length:
+        data = data[:data.rfind(b"\n") + 1]
+    return data
+
+def dataframe_to_csv_bytes(df):
+    """Encode a pandas DataFrame as CSV bytes with Arrow's vectorized writer."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    csv_buffer = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), csv_buffer)
+    return csv_buffer.getvalue()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_report_preview(blob_name, last_modified):
+    """Parse the first 1,000 rows of a report, cached per (name, last_modified); returns (df, bytes_read)."""
+    import pandas as pd
+    # Ranged read: 1,000 rows fit in the first few MB regardless of export size
+    data = read_blob_head(data_client.get_blob_client(blob_name), REPORT_PREVIEW_BYTES)
+    return pd.read_csv(io.BytesIO(data), nrows=1000, on_bad_lines='skip'), len(data)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_quarantine_csv(name, etag):
+    """Download and parse a quarantine CSV, cached per (name, etag)."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    stream = quarantine_client.get_blob_client(name).download_blob(max_concurrency=BLOB_MAX_CONCURRENCY).readall()
+    
+    # Every column stays a string (e.g. "0012" must not become 12), which Arrow needs spelled out by name
+    header_line = stream.split(b"\n", 1)[0].rstrip(b"\r").decode("utf-8-sig")
+    columns = next(csv.reader([header_line]), [])
+    convert_options = pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in columns},
+        strings_can_be_null=True
+    )
+    # Arrow-backed string columns: no per-cell Python str objects, and cheap to hand to the data editor
+    table = pacsv.read_csv(io.BytesIO(stream), convert_options=convert_options)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+def promote_staged_fix(item):
+    """Upload a staged fix to the landing zone; the caller deletes the quarantine originals in one batch.
+
+    Runs on a worker thread, so it must not call any Streamlit APIs.
+    Returns (file_name, ok, error).
+    """
+    fname = item['original_name']
+    try:
+        # Arrow-backed editor columns convert without a per-cell Python formatting pass
+        landing_client.upload_blob(
+            name=fname,
+            data=dataframe_to_csv_bytes(item['dataframe']),
+            overwrite=True,
+            max_concurrency=BLOB_MAX_CONCURRENCY
+        )
+        return fname, True, None
+    except Exception as e:
+        return fname, False, e
 
 # ==========================================
 # SIDEBAR: NAVIGATION & CONTROLS
@@ -116,7 +346,7 @@ with st.sidebar:
 # ==========================================
 # PAGE 0: LANDING PAGE
 # ==========================================
-if page == "🏠 Start Here":
+def page_landing():
     st.title("🧬 Data Pipeline: Admin Console")
     st.markdown("""
     **Welcome.** This dashboard allows users to safely manage the flow of data 
@@ -188,7 +418,9 @@ if page == "🏠 Start Here":
 # ==========================================
 # PAGE 1: UPLOAD NEW DATA
 # ==========================================
-if page == "📤 Upload New Data":
+def page_upload():
+    import pandas as pd
+    
     st.title("📤 Upload New Data")
     st.caption("Upload new CSV files to the landing zone for processing")
     
@@ -206,14 +438,33 @@ if page == "📤 Upload New Data":
         if st.button(f"🚀 Upload {len(uploaded_files)} file(s) to Cloud", type="primary"):
             progress_bar = st.progress(0)
             
-            for idx, up_file in enumerate(uploaded_files):
-                try:
-                    landing_client.upload_blob(name=up_file.name, data=up_file, overwrite=True)
-                    st.write(f"✅ Uploaded `{up_file.name}`")
-                except Exception as e:
-                    st.error(f"❌ Failed `{up_file.name}`: {e}")
+            # UploadedFile is not thread-safe: read the bytes here, on the script thread.
+            with ThreadPoolExecutor(max_workers=min(8, len(uploaded_files))) as executor:
+                futures = {}
+                for up_file in uploaded_files:
+                    # One snapshot of the bytes; an explicit length lets the SDK skip its size probe
+                    data = up_file.getvalue()
+                    future = executor.submit(
+                        landing_client.upload_blob,
+                        name=up_file.name,
+                        data=data,
+                        overwrite=True,
+                        length=len(data),
+                        max_concurrency=BLOB_MAX_CONCURRENCY
+                    )
+                    futures[future] = up_file.name
                 
-                progress_bar.progress((idx + 1) / len(uploaded_files))
+                for idx, future in enumerate(as_completed(futures)):
+                    fname = futures[future]
+                    try:
+                        future.result()
+                        st.write(f"✅ Uploaded `{fname}`")
+                    except Exception as e:
+                        st.error(f"❌ Failed `{fname}`: {e}")
+                    
+                    progress_bar.progress((idx + 1) / len(uploaded_files))
+            
+            list_blobs_cached.clear()
             
             # Increment counter to clear the uploader on rerun
             st.session_state.upload_counter += 1
@@ -250,7 +501,9 @@ if page == "📤 Upload New Data":
 # ==========================================
 # PAGE 2: DATA INGESTION
 # ==========================================
-elif page == "⚙️ Data Ingestion":
+def page_ingestion():
+    import pandas as pd
+    
     st.title("⚙️ Data Ingestion")
     st.caption("View queued files, trigger pipeline processing, and review execution history")
     
@@ -259,33 +512,34 @@ elif page == "⚙️ Data Ingestion":
     st.caption("Files queued for processing")
     
     try:
-        blob_list = list(landing_client.list_blobs())
+        blob_names = [name for name, _ in list_blobs_cached("landing-zone")]
         
-        if not blob_list:
+        if not blob_names:
             st.info("📭 Landing Zone is empty. Upload files in the 'Upload New Data' tab.")
         else:
-            st.success(f"Found {len(blob_list)} file(s) in the landing zone")
+            st.success(f"Found {len(blob_names)} file(s) in the landing zone")
             
             # Show file list
             st.subheader("Files in Queue")
-            for blob in blob_list:
-                st.text(f"📄 {blob.name}")
+            # One Arrow-serialized table instead of a text element per file
+            st.dataframe(pd.DataFrame({"📄 File": blob_names}), width="stretch", hide_index=True)
             
             st.divider()
             
             # File preview
-            if blob_list:
+            if blob_names:
                 st.subheader("📋 File Preview")
                 selected_blob_name = st.selectbox(
                     "Select file to preview:",
-                    [blob.name for blob in blob_list]
+                    blob_names
                 )
                 
                 if selected_blob_name:
                     blob_client = landing_client.get_blob_client(selected_blob_name)
                     try:
-                        data = blob_client.download_blob().readall()
-                        df_preview = pd.read_csv(io.BytesIO(data), nrows=10)
+                        # Ranged read: preview cost no longer scales with blob size
+                        data = read_blob_head(blob_client, PREVIEW_BYTES)
+                        df_preview = pd.read_csv(io.BytesIO(data), nrows=10, on_bad_lines='skip')
                         st.caption(f"Showing first 10 rows of **{selected_blob_name}**")
                         st.dataframe(df_preview, width="stretch")
                         
@@ -302,6 +556,7 @@ elif page == "⚙️ Data Ingestion":
                                 if st.button("✅ Yes, Delete", type="primary", key="confirm_yes_landing"):
                                     try:
                                         blob_client.delete_blob()
+                                        list_blobs_cached.clear()
                                         st.session_state.confirm_delete_landing = None
                                         st.session_state.toast_message = f"Deleted `{selected_blob_name}` from landing zone"
                                         st.rerun()
@@ -335,19 +590,17 @@ elif page == "⚙️ Data Ingestion":
                 st.error("❌ Missing GitHub credentials in .env")
             else:
                 url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/actions/workflows/weekly_pipeline.yaml/dispatches"
-                headers = {
-                    "Authorization": f"Bearer {GITHUB_TOKEN}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
                 data = {"ref": "main"} 
 
                 try:
-                    response = requests.post(url, json=data, headers=headers)
+                    response = gh_session().post(url, json=data)
                     if response.status_code == 204:
                         # Clear last result and store trigger time in UTC and enable monitoring
                         st.session_state.pipeline_last_result = None
                         st.session_state.pipeline_trigger_time = datetime.utcnow().timestamp()
                         st.session_state.pipeline_monitoring = True
+                        fetch_latest_run.clear()
+                        clear_storage_caches()
                         st.rerun()
                     else:
                         st.error(f"**Failed to trigger workflow - HTTP {response.status_code}**")
@@ -369,16 +622,10 @@ elif page == "⚙️ Data Ingestion":
         
         with st.status("📊 Pipeline Status...", expanded=True) as status:
             try:
-                runs_url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/actions/workflows/weekly_pipeline.yaml/runs"
-                headers = {
-                    "Authorization": f"Bearer {GITHUB_TOKEN}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-                
-                response = requests.get(runs_url, headers=headers, params={"per_page": 1})
+                status_code, data = get_latest_run("weekly_pipeline.yaml")
+                warn_if_rate_limited()
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if status_code == 200:
                     
                     if data.get("total_count", 0) == 0:
                         # No workflows at all yet
@@ -432,6 +679,7 @@ elif page == "⚙️ Data Ingestion":
                                     "run_id": run_id
                                 }
                                 st.session_state.pipeline_monitoring = False
+                                clear_storage_caches()
                                 time.sleep(2)
                                 st.rerun()
                                 
@@ -450,6 +698,7 @@ elif page == "⚙️ Data Ingestion":
                                     "run_id": run_id
                                 }
                                 st.session_state.pipeline_monitoring = False
+                                clear_storage_caches()
                                 time.sleep(2)
                                 st.rerun()
                             else:
@@ -465,6 +714,7 @@ elif page == "⚙️ Data Ingestion":
                                     "run_id": run_id
                                 }
                                 st.session_state.pipeline_monitoring = False
+                                clear_storage_caches()
                                 time.sleep(2)
                                 st.rerun()
                         elif run_status == "in_progress":
@@ -486,8 +736,8 @@ elif page == "⚙️ Data Ingestion":
                         
                 else:
                     status.update(label="❌ Failed to Fetch Status", state="error", expanded=True)
-                    st.error(f"**HTTP {response.status_code}**")
-                    st.code(response.text, language="json")
+                    st.error(f"**HTTP {status_code}**")
+                    st.code(data, language="json")
                     st.session_state.pipeline_monitoring = False
                     
             except Exception as e:
@@ -539,33 +789,18 @@ elif page == "⚙️ Data Ingestion":
     st.caption("Metrics from previous pipeline runs")
     
     try:
-        # Get all logs and filter out deletion logs
-        all_log_blobs = list(logs_client.list_blobs())
-        log_blobs = [blob for blob in all_log_blobs if blob.name.startswith('execution_')]
+        log_count, combined_logs, log_errors = load_all_logs('execution_')
         
-        if not log_blobs:
+        if not log_count:
             st.info("📭 No execution logs found. Run the pipeline to generate logs.")
         else:
-            st.success(f"Found {len(log_blobs)} execution log(s)")
-            
-            # Load all logs into a single dataframe
-            all_logs = []
-            for blob in sorted(log_blobs, key=lambda x: x.name, reverse=True):  # Most recent first
-                try:
-                    blob_client = logs_client.get_blob_client(blob.name)
-                    log_data = blob_client.download_blob().readall()
-                    log_df = pd.read_csv(io.BytesIO(log_data))
-                    all_logs.append(log_df)
-                except Exception as e:
-                    st.warning(f"Could not read {blob.name}: {e}")
+            st.success(f"Found {log_count} execution log(s)")
+            if log_count > LOG_HISTORY_LIMIT:
+                st.caption(f"Showing the {LOG_HISTORY_LIMIT} most recent.")
+            for message in log_errors:
+                st.warning(message)
             
-            if all_logs:
-                # Combine all logs
-                combined_logs = pd.concat(all_logs, ignore_index=True)
-                
-                # Sort by timestamp (most recent first)
-                combined_logs = combined_logs.sort_values('execution_timestamp', ascending=False)
-                
+            if combined_logs is not None:
                 # Display summary metrics from most recent run
                 if len(combined_logs) > 0:
                     latest = combined_logs.iloc[0]
@@ -582,7 +817,7 @@ elif page == "⚙️ Data Ingestion":
                     with col4:
                         st.metric("Rows Updated", int(latest['rows_updated']))
                     
-                    st.caption(f"Executed at: {latest['execution_timestamp']}")
+                    st.caption(f"Executed at: {latest['execution_timestamp']:%Y-%m-%d %H:%M:%S}")
                     
                     # Display processing details dropdown for all runs
                     if 'processing_details' in combined_logs.columns:
@@ -594,7 +829,7 @@ elif page == "⚙️ Data Ingestion":
                         
                         if len(runs_with_details) > 0:
                             # Format timestamps for display
-                            runs_with_details['display_timestamp'] = pd.to_datetime(runs_with_details['execution_timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+                            runs_with_details['display_timestamp'] = runs_with_details['execution_timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
                             run_options = [f"Run at {row['display_timestamp']}" for _, row in runs_with_details.iterrows()]
                             
                             selected_run = st.selectbox(
@@ -616,20 +851,17 @@ elif page == "⚙️ Data Ingestion":
                 
                 # Show full history table
                 with st.expander("📊 View Full Execution History"):
-                    # Format the dataframe for display
-                    display_df = combined_logs.copy()
-                    display_df['execution_timestamp'] = pd.to_datetime(display_df['execution_timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Show main metrics table (without processing_details column)
+                    # Show main metrics table (without processing_details column);
+                    # Streamlit formats the timestamps at render time, so the frame is not copied
                     metrics_columns = ['execution_timestamp', 'files_processed', 'rows_quarantined', 'rows_inserted', 'rows_updated']
-                    display_metrics = display_df[metrics_columns] if all(col in display_df.columns for col in metrics_columns) else display_df
                     
                     st.dataframe(
-                        display_metrics,
+                        combined_logs,
                         width="stretch",
                         hide_index=True,
+                        column_order=metrics_columns if all(col in combined_logs.columns for col in metrics_columns) else None,
                         column_config={
-                            "execution_timestamp": "Timestamp",
+                            "execution_timestamp": st.column_config.DatetimeColumn("Timestamp", format="YYYY-MM-DD HH:mm:ss"),
                             "files_processed": "Files",
                             "rows_quarantined": "Quarantined",
                             "rows_inserted": "Inserted",
@@ -637,11 +869,10 @@ elif page == "⚙️ Data Ingestion":
                         }
                     )
                     
-                    # Download option
-                    csv_export = combined_logs.to_csv(index=False).encode('utf-8')
+                    # Download option - encoded only when clicked, not on every rerun
                     st.download_button(
                         label="📥 Download Full Log History",
-                        data=csv_export,
+                        data=lambda: dataframe_to_csv_bytes(combined_logs),
                         file_name="pipeline_execution_history.csv",
                         mime="text/csv"
                     )
@@ -652,7 +883,9 @@ elif page == "⚙️ Data Ingestion":
 # ==========================================
 # PAGE 3: DELETE RECORDS
 # ==========================================
-elif page == "🗑️ Delete Records":
+def page_delete_records():
+    import pandas as pd
+    
     st.title("🗑️ Delete Records from Data Storage")
     st.caption("Upload a CSV with sample_id and test_date to permanently remove records")
     
@@ -700,16 +933,12 @@ elif page == "🗑️ Delete Records":
                 # Upload button
                 if st.button("📤 Upload Deletion Request", type="primary"):
                     try:
-                        from datetime import datetime
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         filename = f"deletion_request_{timestamp}.csv"
                         
-                        # Get deletion-requests container client
-                        deletion_client = blob_service.get_container_client("deletion-requests")
-                        
                         # Upload the deletion request
-                        csv_data = deletion_df.to_csv(index=False).encode('utf-8')
-                        deletion_client.upload_blob(filename, csv_data, overwrite=True)
+                        deletion_client.upload_blob(filename, dataframe_to_csv_bytes(deletion_df), overwrite=True)
+                        list_blobs_cached.clear()
                         
                         st.success(f"✅ Uploaded deletion request: `{filename}`")
                         st.info("""
@@ -736,18 +965,17 @@ elif page == "🗑️ Delete Records":
     # Show existing deletion requests
     st.subheader("📦 Pending Deletion Requests")
     try:
-        deletion_client = blob_service.get_container_client("deletion-requests")
-        deletion_blobs = list(deletion_client.list_blobs())
+        deletion_names = [name for name, _ in list_blobs_cached("deletion-requests")]
         
-        if not deletion_blobs:
+        if not deletion_names:
             st.info("📭 No pending deletion requests")
         else:
-            st.warning(f"⚠️ Found {len(deletion_blobs)} pending deletion request(s)")
+            st.warning(f"⚠️ Found {len(deletion_names)} pending deletion request(s)")
             
             # Combined preview and file selector
             selected_deletion_file = st.selectbox(
                 "Select file to preview:",
-                [blob.name for blob in deletion_blobs],
+                deletion_names,
                 key="deletion_preview_selector"
             )
             
@@ -776,6 +1004,7 @@ elif page == "🗑️ Delete Records":
                             if st.button("✅ Yes, Delete", type="primary", key="confirm_yes_deletion"):
                                 try:
                                     blob_client.delete_blob()
+                                    list_blobs_cached.clear()
                                     st.session_state.confirm_delete_deletion = None
                                     st.session_state.toast_message = f"Deleted `{selected_deletion_file}` from deletion requests"
                                     st.rerun()
@@ -807,19 +1036,17 @@ elif page == "🗑️ Delete Records":
                     st.error("❌ Missing GitHub credentials in .env")
                 else:
                     url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/actions/workflows/delete_records.yaml/dispatches"
-                    headers = {
-                        "Authorization": f"Bearer {GITHUB_TOKEN}",
-                        "Accept": "application/vnd.github.v3+json"
-                    }
                     data = {"ref": "main"}
 
                     try:
-                        response = requests.post(url, json=data, headers=headers)
+                        response = gh_session().post(url, json=data)
                         if response.status_code == 204:
                             # Clear last result and store trigger time in UTC and enable monitoring
                             st.session_state.deletion_last_result = None
                             st.session_state.deletion_trigger_time = datetime.utcnow().timestamp()
                             st.session_state.deletion_monitoring = True
+                            fetch_latest_run.clear()
+                            clear_storage_caches()
                             st.rerun()
                         else:
                             st.error(f"**Failed to trigger workflow - HTTP {response.status_code}**")
@@ -841,16 +1068,10 @@ elif page == "🗑️ Delete Records":
             
             with st.status("📊 Deletion Status...", expanded=True) as status:
                 try:
-                    runs_url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/actions/workflows/delete_records.yaml/runs"
-                    headers = {
-                        "Authorization": f"Bearer {GITHUB_TOKEN}",
-                        "Accept": "application/vnd.github.v3+json"
-                    }
+                    status_code, data = get_latest_run("delete_records.yaml")
+                    warn_if_rate_limited()
                     
-                    response = requests.get(runs_url, headers=headers, params={"per_page": 1})
-                    
-                    if response.status_code == 200:
-                        data = response.json()
+                    if status_code == 200:
                         
                         if data.get("total_count", 0) == 0:
                             # No workflows at all yet
@@ -904,6 +1125,7 @@ elif page == "🗑️ Delete Records":
                                         "run_id": run_id
                                     }
                                     st.session_state.deletion_monitoring = False
+                                    clear_storage_caches()
                                     time.sleep(2)
                                     st.rerun()
                                     
@@ -922,6 +1144,7 @@ elif page == "🗑️ Delete Records":
                                         "run_id": run_id
                                     }
                                     st.session_state.deletion_monitoring = False
+                                    clear_storage_caches()
                                     time.sleep(2)
                                     st.rerun()
                                 else:
@@ -937,6 +1160,7 @@ elif page == "🗑️ Delete Records":
                                         "run_id": run_id
                                     }
                                     st.session_state.deletion_monitoring = False
+                                    clear_storage_caches()
                                     time.sleep(2)
                                     st.rerun()
                             elif run_status == "in_progress":
@@ -958,8 +1182,8 @@ elif page == "🗑️ Delete Records":
                             
                     else:
                         status.update(label="❌ Failed to Fetch Status", state="error", expanded=True)
-                        st.error(f"**HTTP {response.status_code}**")
-                        st.code(response.text, language="json")
+                        st.error(f"**HTTP {status_code}**")
+                        st.code(data, language="json")
                         st.session_state.deletion_monitoring = False
                         
                 except Exception as e:
@@ -1014,33 +1238,18 @@ elif page == "🗑️ Delete Records":
     st.caption("Logs from previous deletion runs")
     
     try:
-        # Get all logs and filter for deletion logs only
-        all_log_blobs = list(logs_client.list_blobs())
-        deletion_log_blobs = [blob for blob in all_log_blobs if blob.name.startswith('deletion_')]
+        log_count, combined_deletion_logs, log_errors = load_all_logs('deletion_')
         
-        if not deletion_log_blobs:
+        if not log_count:
             st.info("📭 No deletion logs found. Run the delete workflow to generate logs.")
         else:
-            st.success(f"Found {len(deletion_log_blobs)} deletion log(s)")
-            
-            # Load all deletion logs into a single dataframe
-            all_deletion_logs = []
-            for blob in sorted(deletion_log_blobs, key=lambda x: x.name, reverse=True):  # Most recent first
-                try:
-                    blob_client = logs_client.get_blob_client(blob.name)
-                    log_data = blob_client.download_blob().readall()
-                    log_df = pd.read_csv(io.BytesIO(log_data))
-                    all_deletion_logs.append(log_df)
-                except Exception as e:
-                    st.warning(f"Could not read {blob.name}: {e}")
+            st.success(f"Found {log_count} deletion log(s)")
+            if log_count > LOG_HISTORY_LIMIT:
+                st.caption(f"Showing the {LOG_HISTORY_LIMIT} most recent.")
+            for message in log_errors:
+                st.warning(message)
             
-            if all_deletion_logs:
-                # Combine all logs
-                combined_deletion_logs: pd.DataFrame = pd.concat(all_deletion_logs, ignore_index=True)
-                
-                # Sort by timestamp (most recent first)
-                combined_deletion_logs = combined_deletion_logs.sort_values('execution_timestamp', ascending=False)
-                
+            if combined_deletion_logs is not None:
                 # Display summary metrics from most recent run
                 if len(combined_deletion_logs) > 0:
                     latest: pd.Series = combined_deletion_logs.iloc[0]
@@ -1055,7 +1264,7 @@ elif page == "🗑️ Delete Records":
                     with col3:
                         st.metric("Partitions Updated", int(latest['partitions_updated']))
                     
-                    st.caption(f"Executed at: {latest['execution_timestamp']}")
+                    st.caption(f"Executed at: {latest['execution_timestamp']:%Y-%m-%d %H:%M:%S}")
                     
                     # Display processing details dropdown for all runs
                     if 'processing_details' in combined_deletion_logs.columns:
@@ -1067,7 +1276,7 @@ elif page == "🗑️ Delete Records":
                         
                         if len(runs_with_details) > 0:
                             # Format timestamps for display
-                            runs_with_details['display_timestamp'] = pd.to_datetime(runs_with_details['execution_timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+                            runs_with_details['display_timestamp'] = runs_with_details['execution_timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
                             run_options = [f"Run at {row['display_timestamp']}" for _, row in runs_with_details.iterrows()]
                             
                             selected_run = st.selectbox(
@@ -1089,31 +1298,27 @@ elif page == "🗑️ Delete Records":
                 
                 # Show full history table
                 with st.expander("📊 View Full Deletion History"):
-                    # Format the dataframe for display
-                    display_df: pd.DataFrame = combined_deletion_logs.copy()
-                    display_df['execution_timestamp'] = pd.to_datetime(display_df['execution_timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Show main metrics table (without processing_details column)
+                    # Show main metrics table (without processing_details column);
+                    # Streamlit formats the timestamps at render time, so the frame is not copied
                     metrics_columns = ['execution_timestamp', 'files_processed', 'rows_deleted', 'partitions_updated']
-                    display_metrics = display_df[metrics_columns] if all(col in display_df.columns for col in metrics_columns) else display_df
                     
                     st.dataframe(
-                        display_metrics,
+                        combined_deletion_logs,
                         width="stretch",
                         hide_index=True,
+                        column_order=metrics_columns if all(col in combined_deletion_logs.columns for col in metrics_columns) else None,
                         column_config={
-                            "execution_timestamp": "Timestamp",
+                            "execution_timestamp": st.column_config.DatetimeColumn("Timestamp", format="YYYY-MM-DD HH:mm:ss"),
                             "files_processed": "Files",
                             "rows_deleted": "Deleted",
                             "partitions_updated": "Partitions"
                         }
                     )
                     
-                    # Download option
-                    csv_export = combined_deletion_logs.to_csv(index=False).encode('utf-8')
+                    # Download option - encoded only when clicked, not on every rerun
                     st.download_button(
                         label="📥 Download Full Deletion History",
-                        data=csv_export,
+                        data=lambda: dataframe_to_csv_bytes(combined_deletion_logs),
                         file_name="deletion_execution_history.csv",
                         mime="text/csv"
                     )
@@ -1124,12 +1329,12 @@ elif page == "🗑️ Delete Records":
 # ==========================================
 # PAGE 4: FIX QUARANTINE
 # ==========================================
-elif page == "🛠️ Fix Quarantine":
+def page_fix_quarantine():
     st.title("🛠️ Quarantine Manager")
     
-    blob_list = list(quarantine_client.list_blobs())
-    staged_names = [item['original_name'] for item in st.session_state.staged_fixes]
-    remaining_blobs = [b.name for b in blob_list if b.name not in staged_names]
+    quarantine_etags = dict(list_blobs_cached("quarantine"))
+    staged_names = {item['original_name'] for item in st.session_state.staged_fixes}
+    remaining_blobs = [name for name in quarantine_etags if name not in staged_names]
     
     if not remaining_blobs:
         if staged_names:
@@ -1145,9 +1350,8 @@ elif page == "🛠️ Fix Quarantine":
         )
 
         if selected_file:
-            blob_client = quarantine_client.get_blob_client(selected_file)
-            stream = blob_client.download_blob().readall()
-            df = pd.read_csv(io.BytesIO(stream), dtype=str)
+            # Editor reruns hit the cache; a changed ETag means the blob changed server-side
+            df = load_quarantine_csv(selected_file, quarantine_etags[selected_file])
             
             # Show column info
             st.caption(f"📋 Columns: {', '.join(df.columns.tolist())}")
@@ -1187,6 +1391,7 @@ elif page == "🛠️ Fix Quarantine":
                         try:
                             blob_client = quarantine_client.get_blob_client(selected_file)
                             blob_client.delete_blob()
+                            list_blobs_cached.clear()
                             st.session_state.confirm_delete_quarantine = None
                             st.session_state.toast_message = f"Deleted `{selected_file}` from quarantine"
                             st.rerun()
@@ -1233,44 +1438,64 @@ elif page == "🛠️ Fix Quarantine":
         # Upload button
         if st.button(f"🚀 Upload All {len(st.session_state.staged_fixes)} Fixed File(s) to Cloud", type="primary"):
             progress_bar = st.progress(0)
+            total_steps = len(st.session_state.staged_fixes)
             
-            for idx, item in enumerate(st.session_state.staged_fixes):
-                fname = item['original_name']
-                df = item['dataframe']
+            failed_items = []
+            promoted_names = []
+            
+            # Promote files concurrently; UI updates stay on the main script thread
+            with ThreadPoolExecutor(max_workers=min(8, total_steps)) as executor:
+                futures = {executor.submit(promote_staged_fix, item): item for item in st.session_state.staged_fixes}
                 
-                try:
-                    csv_buffer = df.to_csv(index=False)
-                    landing_client.upload_blob(name=fname, data=csv_buffer, overwrite=True)
-                    st.write(f"✅ Promoted `{fname}`")
-                    
-                    # Delete from quarantine
-                    q_blob = quarantine_client.get_blob_client(fname)
-                    q_blob.delete_blob()
+                for idx, future in enumerate(as_completed(futures)):
+                    item = futures[future]
+                    fname, ok, err = future.result()
+                    if ok:
+                        st.write(f"✅ Promoted `{fname}`")
+                        promoted_names.append(fname)
+                    else:
+                        st.error(f"❌ Failed to promote `{fname}`: {err}")
+                        failed_items.append(item)
                     
+                    progress_bar.progress((idx + 1) / total_steps)
+            
+            # Remove the promoted originals from quarantine in batch requests, not one DELETE each
+            delete_error = None
+            if promoted_names:
+                from pipeline.azure_clients import delete_blobs_batched
+                try:
+                    delete_blobs_batched(quarantine_client, promoted_names)
                 except Exception as e:
-                    st.error(f"❌ Failed to promote `{fname}`: {e}")
-                
-                progress_bar.progress((idx + 1) / len(st.session_state.staged_fixes))
+                    delete_error = e
             
-            st.session_state.staged_fixes = []
-            st.session_state.upload_success = True
+            list_blobs_cached.clear()
+            
+            # Keep failed fixes staged so the edits are not lost
+            st.session_state.staged_fixes = failed_items
+            if failed_items:
+                st.session_state.toast_message = f"{len(failed_items)} file(s) failed to upload and are still staged"
+            elif delete_error:
+                st.session_state.toast_message = f"Fixes uploaded, but some originals could not be removed from quarantine: {delete_error}"
+            else:
+                st.session_state.upload_success = True
             st.rerun()
 
 # ==========================================
 # PAGE 5: FINAL REPORT
 # ==========================================
-elif page == "📊 Final Report":
+def page_final_report():
     st.title("📊 CDC Final Export Review")
     
     blob_name = "final_cdc_export.csv"
     blob_client = data_client.get_blob_client(blob_name)
+    report_props = get_report_props(blob_name)
     
-    if not blob_client.exists():
+    if report_props is None:
         st.warning("⚠️ No report found. Run the pipeline first!")
     else:
-        props = blob_client.get_blob_properties()
-        file_size_mb = props.size / (1024 * 1024)
-        last_modified = props.last_modified.strftime('%Y-%m-%d %H:%M:%S')
+        size, modified = report_props
+        file_size_mb = size / (1024 * 1024)
+        last_modified = modified.strftime('%Y-%m-%d %H:%M:%S')
         
         st.info(f"📅 Last Generated: **{last_modified}** | 📦 Size: **{file_size_mb:.2f} MB**")
 
@@ -1280,20 +1505,18 @@ elif page == "📊 Final Report":
         with col1:
             if st.button("👁️ Preview (Top 1,000 Rows)"):
                 try:
-                    stream = blob_client.download_blob()
-                    preview_df = pd.read_csv(io.BytesIO(stream.readall()), nrows=1000)
-                    st.session_state.preview_df = preview_df
+                    # A regenerated report has a new Last-Modified, which busts the cache
+                    st.session_state.preview_df, st.session_state.preview_bytes = load_report_preview(blob_name, modified)
                 except Exception as e:
                     st.error(f"Preview failed: {e}")
 
         # DOWNLOAD ACTION
         with col2:
-            with st.spinner("Downloading full file from Cloud..."):
-                full_data = blob_client.download_blob().readall()
-            
+            # Deferred: the blob is only fetched when clicked, on its own thread,
+            # and is never kept in session state between reruns
             st.download_button(
                 label="📥 Download Full CSV",
-                data=full_data,
+                data=lambda: blob_client.download_blob(max_concurrency=BLOB_MAX_CONCURRENCY).readall(),
                 file_name="final_cdc_export.csv",
                 mime="text/csv",
                 use_container_width=True
@@ -1304,12 +1527,13 @@ elif page == "📊 Final Report":
             st.divider()
             st.subheader("Data Preview")
             st.dataframe(st.session_state.preview_df, width="stretch")
-            st.caption(f"Showing first {len(st.session_state.preview_df)} rows.")
+            st.caption(f"Showing first {len(st.session_state.preview_df)} rows "
+                       f"(read from the first {st.session_state.preview_bytes / (1024 * 1024):.2f} MB).")
 
 # ==========================================
 # PAGE 6: ABOUT
 # ==========================================
-elif page == "ℹ️ About":
+def page_about():
     st.title("ℹ️ About This Project")
     
     st.markdown("""
@@ -1432,4 +1656,22 @@ elif page == "ℹ️ About":
         </a>
     </div>
     """, unsafe_allow_html=True)
-            
\ No newline at end of file
+
+# ==========================================
+# PAGE ROUTER
+# ==========================================
+PAGES = {
+    "🏠 Start Here": page_landing,
+    "📤 Upload New Data": page_upload,
+    "🛠️ Fix Quarantine": page_fix_quarantine,
+    "🗑️ Delete Records": page_delete_records,
+    "⚙️ Data Ingestion": page_ingestion,
+    "📊 Final Report": page_final_report,
+    "ℹ️ About": page_about
+}
+
+# Start Here and About are static, so they render without loading Azure or pandas
+if page not in ("🏠 Start Here", "ℹ️ About"):
+    connect_azure()
+
+PAGES[page]()
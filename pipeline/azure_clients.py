@@ -0,0 +1,42 @@
+"""
+Shared Azure Blob Storage client setup for the pipeline scripts and admin tools.
+"""
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+import requests
+from requests.adapters import HTTPAdapter
+
+# Parallel range GETs / block PUTs per blob transfer
+TRANSFER_CONCURRENCY = 8
+# Blobs over 4 MiB go up as parallel 8 MiB blocks instead of one PUT
+MAX_SINGLE_PUT_SIZE = 4 * 1024 * 1024
+MAX_BLOCK_SIZE = 8 * 1024 * 1024
+# The blob batch endpoint takes at most 256 sub-requests per call
+DELETE_BATCH_SIZE = 256
+
+def make_blob_service_client(workers, account_url=None, credential=None, connection_string=None,
+                             connection_timeout=300, read_timeout=300):
+    """Build a BlobServiceClient whose HTTP pool fits `workers` threads each running parallel transfers."""
+    # Default pool is 10 connections; every worker thread running parallel chunk transfers
+    # needs its own, or connections are discarded and re-handshaked
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=workers * TRANSFER_CONCURRENCY))
+    transport = RequestsTransport(
+        session=session,
+        session_owner=False,
+        connection_timeout=connection_timeout,
+        read_timeout=read_timeout
+    )
+    client_settings = dict(
+        transport=transport,
+        max_single_put_size=MAX_SINGLE_PUT_SIZE,
+        max_block_size=MAX_BLOCK_SIZE
+    )
+    if connection_string:
+        return BlobServiceClient.from_connection_string(connection_string, **client_settings)
+    return BlobServiceClient(account_url, credential=credential, **client_settings)
+
+def delete_blobs_batched(container_client, names):
+    """Delete blobs through the batch endpoint; raises if any sub-request fails."""
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        container_client.delete_blobs(*names[start:start + DELETE_BATCH_SIZE])
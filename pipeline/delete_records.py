@@ -5,20 +5,33 @@ removes them, and re-uploads the updated parquet files.
 """
 import os
 import io
+import struct
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
+# --- MODULE IMPORTS ---
+from pipeline.azure_clients import make_blob_service_client, delete_blobs_batched, TRANSFER_CONCURRENCY
+
 # --- CONFIGURATION ---
 load_dotenv()
 ACCOUNT_NAME = os.getenv("AZURE_STORAGE_ACCOUNT")
 ACCOUNT_URL = f"https://{ACCOUNT_NAME}.blob.core.windows.net"
+# Partitions rewritten at the same time
+PARTITION_WORKERS = 8
+# Tail bytes fetched to read a partition's parquet footer before downloading it
+FOOTER_GUESS = 64 * 1024
+# Rows per parquet row group; each group carries its own sample_id min/max statistics
+PARQUET_ROW_GROUP_SIZE = 100_000
 
 print(f"🔌 Connecting to {ACCOUNT_NAME}...")
 credential = DefaultAzureCredential()
-blob_service = BlobServiceClient(ACCOUNT_URL, credential=credential)
+blob_service = make_blob_service_client(PARTITION_WORKERS, account_url=ACCOUNT_URL, credential=credential)
 
 deletion_client = blob_service.get_container_client("deletion-requests")
 data_client = blob_service.get_container_client("data")
@@ -52,16 +65,14 @@ def process_deletions():
     
     # Collect all deletion requests
     all_deletions = []
+    processed_requests = []
     
-    for blob in deletion_blobs:
-        print(f"✅ Reading {blob.name}...")
-        
-        blob_client = deletion_client.get_blob_client(blob.name)
-        downloaded_bytes = blob_client.download_blob().readall()
-        
+    with ThreadPoolExecutor(max_workers=PARTITION_WORKERS) as executor:
+        futures = [executor.submit(_read_deletion_request, blob.name) for blob in deletion_blobs]
+    
+    for blob, future in zip(deletion_blobs, futures):
         try:
-            # Read deletion CSV (must have sample_id and test_date columns)
-            df = pl.read_csv(io.BytesIO(downloaded_bytes))
+            df = future.result()
             
             # Validate required columns
             if 'sample_id' not in df.columns or 'test_date' not in df.columns:
@@ -77,16 +88,22 @@ def process_deletions():
             
             all_deletions.append(deletion_df)
             processing_log.append(f"✅ Processed {blob.name}: {len(deletion_df)} deletion request(s)")
-            
-            # Delete processed request file
-            print(f"🗑️ Deleting {blob.name} from deletion-requests...")
-            blob_client.delete_blob()
+            processed_requests.append(blob.name)
             
         except Exception as e:
             print(f"❌ Error processing {blob.name}: {e}")
             processing_log.append(f"❌ Error processing {blob.name}: {str(e)}")
             continue
     
+    # Delete processed request files in batch requests, not one DELETE each
+    if processed_requests:
+        print(f"🗑️ Deleting {len(processed_requests)} processed file(s) from deletion-requests...")
+        try:
+            delete_blobs_batched(deletion_client, processed_requests)
+        except Exception as e:
+            print(f"❌ Error deleting processed request files: {e}")
+            processing_log.append(f"❌ Error deleting processed request files: {str(e)}")
+    
     if not all_deletions:
         print("❌ No valid deletion requests to process.")
         processing_log.append("❌ No valid deletion requests to process")
@@ -95,77 +112,26 @@ def process_deletions():
     
     # Combine all deletion requests
     deletions_df = pl.concat(all_deletions)
-    unique_ids = deletions_df["sample_id"].unique().to_list()
-    print(f"🔍 Total unique deletion requests: {len(unique_ids)}")
-    processing_log.append(f"🔍 Total unique deletion requests: {len(unique_ids)}")
+    unique_id_count = deletions_df["sample_id"].n_unique()
+    print(f"🔍 Total unique deletion requests: {unique_id_count}")
+    processing_log.append(f"🔍 Total unique deletion requests: {unique_id_count}")
     
     # 2. CALCULATE PARTITIONS TO CHECK
-    # Add partition path to deletion requests
-    deletions_df = deletions_df.with_columns(
-        partition_path = pl.format("year={}/week={}", 
-                                   pl.col("test_date").dt.year(), 
-                                   pl.col("test_date").dt.week())
-    )
-    
-    unique_partitions = deletions_df["partition_path"].unique().to_list()
-    print(f"📊 Checking {len(unique_partitions)} partition(s)...")
-    processing_log.append(f"📊 Checking {len(unique_partitions)} partition(s)")
+    ids_by_partition = _group_ids_by_partition(deletions_df)
+    print(f"📊 Checking {len(ids_by_partition)} partition(s)...")
+    processing_log.append(f"📊 Checking {len(ids_by_partition)} partition(s)")
     
     # 3. PROCESS EACH PARTITION
     total_deleted = 0
     partitions_updated = 0
     
-    for part_path in unique_partitions:
-        print(f"\n📁 Processing partition: {part_path}")
-        
-        # Get deletion IDs for this partition
-        partition_deletions = deletions_df.filter(pl.col("partition_path") == part_path)
-        ids_to_delete = set(partition_deletions["sample_id"].to_list())
-        
-        # Check if partition file exists
-        blob_name = f"{part_path}/data.parquet"
-        blob_client = data_client.get_blob_client(blob_name)
-        
-        if not blob_client.exists():
-            print(f"  ⚠️ Partition file not found: {blob_name}")
-            processing_log.append(f"📁 {part_path}: ⚠️ Partition file not found")
-            continue
-        
-        # Download existing data
-        print(f"  ⬇️ Downloading {blob_name}...")
-        download_stream = blob_client.download_blob()
-        history_df = pl.read_parquet(io.BytesIO(download_stream.readall()))
-        
-        rows_before = len(history_df)
-        
-        # Use vectorized filtering for better performance
-        filtered_df = history_df.filter(~pl.col("sample_id").is_in(ids_to_delete))
-        
-        rows_after = len(filtered_df)
-        rows_deleted = rows_before - rows_after
-        
-        if rows_deleted > 0:
-            # Track which IDs were actually deleted (only those that existed)
-            existing_ids = set(history_df["sample_id"].to_list())
-            deleted_ids = sorted(ids_to_delete & existing_ids)
-            
-            print(f"  🗑️ Removing {rows_deleted} record(s)...")
-            print(f"  🆔 Deleted sample_ids: {', '.join(deleted_ids)}")
-            total_deleted += rows_deleted
-            partitions_updated += 1
-            
-            # Log detailed deletion info with sample IDs
-            ids_str = ', '.join(deleted_ids)
-            processing_log.append(f"📁 {part_path}: 🗑️ Deleted {rows_deleted} record(s) | 🆔 IDs: {ids_str} | 📊 {rows_after} rows remaining")
-            
-            # Upload updated parquet
-            output_stream = io.BytesIO()
-            filtered_df.write_parquet(output_stream)
-            blob_client.upload_blob(output_stream.getvalue(), overwrite=True)
-            print(f"  ✅ Updated {blob_name} ({rows_after} rows remaining)")
-        else:
-            print(f"  ℹ️ No matching records found in this partition")
-            processing_log.append(f"📁 {part_path}: ℹ️ No matching records found")
+    with ThreadPoolExecutor(max_workers=PARTITION_WORKERS) as executor:
+        results = list(executor.map(_process_partition, ids_by_partition.keys(), ids_by_partition.values()))
+    
+    for rows_deleted, updated, log_line in results:
+        total_deleted += rows_deleted
+        partitions_updated += int(updated)
+        processing_log.append(log_line)
     
     log_entry['rows_deleted'] = total_deleted
     log_entry['partitions_updated'] = partitions_updated
@@ -178,6 +144,132 @@ def process_deletions():
     # Save deletion log
     _save_deletion_log(log_entry, processing_log)
 
+def _group_ids_by_partition(deletions_df):
+    """Map each year=/week= partition path to the set of sample_ids to delete from it."""
+    # Blank cells read as null; they match nothing and cannot be compared against footer stats
+    deletions_df = deletions_df.drop_nulls(["sample_id", "test_date"])
+    
+    # Add partition path to deletion requests
+    deletions_df = deletions_df.with_columns(
+        partition_path = pl.format("year={}/week={}", 
+                                   pl.col("test_date").dt.year(), 
+                                   pl.col("test_date").dt.week())
+    )
+    
+    # Group deletion IDs by partition in a single pass
+    return {
+        part_path: set(ids)
+        for part_path, ids in deletions_df.group_by("partition_path", maintain_order=True).agg(pl.col("sample_id")).iter_rows()
+    }
+
+def _read_deletion_request(blob_name):
+    """Download one deletion-request CSV as all-string columns."""
+    print(f"✅ Reading {blob_name}...")
+    downloaded_bytes = deletion_client.get_blob_client(blob_name).download_blob().readall()
+    
+    # Read deletion CSV (must have sample_id and test_date columns).
+    # All strings, as in the ingest pipeline: skips type inference and keeps
+    # numeric-looking IDs like "001" matching the stored string sample_ids
+    return pl.read_csv(io.BytesIO(downloaded_bytes), infer_schema_length=0)
+
+def _process_partition(part_path, ids_to_delete):
+    """Remove matching sample_ids from one partition; returns (rows_deleted, updated, log_line)."""
+    print(f"\n📁 Processing partition: {part_path}")
+    
+    # Check if partition file exists
+    blob_name = f"{part_path}/data.parquet"
+    blob_client = data_client.get_blob_client(blob_name)
+    
+    try:
+        blob_size = blob_client.get_blob_properties().size
+    except ResourceNotFoundError:
+        print(f"  ⚠️ Partition file not found: {blob_name}")
+        return 0, False, f"📁 {part_path}: ⚠️ Partition file not found"
+    
+    # Read just the footer; skip the download when row group stats rule out every ID
+    tail = _read_parquet_tail(blob_client, blob_size)
+    if not _stats_may_match(tail, ids_to_delete):
+        print(f"  ⏭️ Footer statistics rule out {part_path}")
+        return 0, False, f"📁 {part_path}: ℹ️ No matching records found"
+    
+    # Download existing data (small partitions were already fetched whole as the tail)
+    if len(tail) == blob_size:
+        history_buffer = io.BytesIO(tail)
+    else:
+        print(f"  ⬇️ Downloading {blob_name}...")
+        history_buffer = io.BytesIO()
+        blob_client.download_blob(max_concurrency=TRANSFER_CONCURRENCY).readinto(history_buffer)
+        history_buffer.seek(0)
+    
+    # Probe only the sample_id column first; untouched partitions are never fully decoded
+    id_column = pl.read_parquet(history_buffer, columns=["sample_id"])["sample_id"]
+    delete_mask = id_column.is_in(list(ids_to_delete))
+    rows_deleted = int(delete_mask.sum())
+    
+    if rows_deleted == 0:
+        print(f"  ℹ️ No matching records found in {part_path}")
+        return 0, False, f"📁 {part_path}: ℹ️ No matching records found"
+    
+    history_buffer.seek(0)
+    filtered_df = pl.read_parquet(history_buffer).filter(~delete_mask)
+    rows_after = len(filtered_df)
+    
+    # Track which IDs were actually deleted (only those that existed)
+    deleted_ids = sorted(id_column.filter(delete_mask).unique().to_list())
+    ids_str = ', '.join(deleted_ids)
+    
+    print(f"  🗑️ Removing {rows_deleted} record(s) from {part_path}...")
+    print(f"  🆔 Deleted sample_ids: {ids_str}")
+    
+    # Upload updated parquet
+    output_stream = io.BytesIO()
+    # Filtering keeps the sample_id sort order the pipeline wrote with
+    filtered_df.write_parquet(
+        output_stream, compression="zstd", statistics=True, row_group_size=PARQUET_ROW_GROUP_SIZE
+    )
+    blob_client.upload_blob(output_stream.getvalue(), overwrite=True, max_concurrency=TRANSFER_CONCURRENCY)
+    print(f"  ✅ Updated {blob_name} ({rows_after} rows remaining)")
+    
+    # Log detailed deletion info with sample IDs
+    return rows_deleted, True, f"📁 {part_path}: 🗑️ Deleted {rows_deleted} record(s) | 🆔 IDs: {ids_str} | 📊 {rows_after} rows remaining"
+
+def _has_parquet_footer(tail):
+    """True if the bytes end with a footer length and the PAR1 magic."""
+    return len(tail) >= 8 and tail[-4:] == b"PAR1"
+
+def _read_parquet_tail(blob_client, blob_size):
+    """Ranged GET of the end of a parquet blob, widened if the footer is larger than FOOTER_GUESS."""
+    length = min(blob_size, FOOTER_GUESS)
+    if length == 0:
+        return b""
+    tail = blob_client.download_blob(offset=blob_size - length, length=length).readall()
+    if not _has_parquet_footer(tail):
+        return tail
+    footer_len = struct.unpack("<I", tail[-8:-4])[0]
+    if footer_len + 8 > length:
+        length = min(blob_size, footer_len + 8)
+        tail = blob_client.download_blob(offset=blob_size - length, length=length).readall()
+    return tail
+
+def _stats_may_match(tail, ids_to_delete):
+    """True unless every row group's sample_id min/max range misses all IDs to delete."""
+    if not _has_parquet_footer(tail):
+        return True  # Truncated or not parquet - fall back to a full download
+    try:
+        footer_len = struct.unpack("<I", tail[-8:-4])[0]
+        metadata = pq.read_metadata(pa.BufferReader(b"PAR1" + tail[-(footer_len + 8):]))
+        col_idx = metadata.schema.names.index("sample_id")
+    except (pa.ArrowException, ValueError):
+        return True  # Unreadable footer - fall back to a full download
+    
+    for rg in range(metadata.num_row_groups):
+        stats = metadata.row_group(rg).column(col_idx).statistics
+        if stats is None or not stats.has_min_max:
+            return True
+        if any(stats.min <= sample_id <= stats.max for sample_id in ids_to_delete):
+            return True
+    return False
+
 def _save_deletion_log(log_entry, processing_log):
     """Save deletion log to logs container as CSV."""
     try:
@@ -1,10 +1,13 @@
 import polars as pl
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
+# --- MODULE IMPORTS ---
+from pipeline.azure_clients import make_blob_service_client, TRANSFER_CONCURRENCY
+
 print("🚀 RUNNING SCRIPT: Polars Export (Parquet Edition)")
 
 # --- CONFIGURATION ---
@@ -15,11 +18,12 @@ ACCOUNT_URL = f"https://{ACCOUNT_NAME}.blob.core.windows.net"
 # Config settings
 LOCAL_DOWNLOAD_DIR = "temp_lakehouse"
 TARGET_PREFIXES = [""] # Download everything
+DOWNLOAD_WORKERS = 16 # Partition files downloaded at the same time
 
 # --- 1. DOWNLOAD (Client-Side Pruning) ---
 print("🔌 Connecting to Azure...")
 credential = DefaultAzureCredential()
-blob_service = BlobServiceClient(ACCOUNT_URL, credential=credential)
+blob_service = make_blob_service_client(DOWNLOAD_WORKERS, account_url=ACCOUNT_URL, credential=credential)
 data_client = blob_service.get_container_client("data")
 
 print("⬇️  Downloading files...")
@@ -29,7 +33,17 @@ if os.path.exists(LOCAL_DOWNLOAD_DIR):
     shutil.rmtree(LOCAL_DOWNLOAD_DIR)
 os.makedirs(LOCAL_DOWNLOAD_DIR, exist_ok=True)
 
-downloaded_files = []
+def download_partition(blob_name):
+    """Stream one partition file to disk and return its local path."""
+    local_path = os.path.join(LOCAL_DOWNLOAD_DIR, blob_name)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    
+    # Stream to disk instead of holding the whole blob in memory first
+    with open(local_path, "wb") as f:
+        data_client.download_blob(blob_name, max_concurrency=TRANSFER_CONCURRENCY).readinto(f)
+    return local_path
+
+partition_names = []
 
 for blob in blobs:
     # CHANGE: We now look for .parquet files
@@ -43,13 +57,10 @@ for blob in blobs:
             break
     if not match: continue
 
-    local_path = os.path.join(LOCAL_DOWNLOAD_DIR, blob.name)
-    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-    
-    with open(local_path, "wb") as f:
-        f.write(data_client.download_blob(blob.name).readall())
-    
-    downloaded_files.append(local_path)
+    partition_names.append(blob.name)
+
+with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+    downloaded_files = list(executor.map(download_partition, partition_names))
 
 if not downloaded_files:
     print("No files found!")
@@ -60,22 +71,29 @@ print("📦 Generating report with Polars...")
 
 # CHANGE: Read Parquet instead of CSV
 # Parquet already knows 'viral_load' is Int and 'test_date' is Date.
-df = pl.read_parquet(downloaded_files)
+# Scan lazily so the sort and CSV write stream instead of holding the whole lakehouse in memory;
+# hive_partitioning=False keeps the year/week path segments out of the report columns
+lf = pl.scan_parquet(downloaded_files, hive_partitioning=False)
 
 # DELETED: The 'df.with_columns(...str.to_date...)' block.
 # We don't need it anymore because Parquet preserved the Date type!
 
-# Sort descending by date
-df = df.sort("test_date", descending=True)
-
-# Save to CSV (Final report usually needs to be CSV for compatibility)
+# Sort descending by date and save to CSV (Final report usually needs to be CSV for compatibility)
 local_filename = "final_cdc_export.csv"
-df.write_csv(local_filename)
-print(f"✅ Created {local_filename} with {len(df)} rows.")
+lf.sort("test_date", descending=True).sink_csv(local_filename)
+# Row count comes from the parquet footers, not a second read of the data
+row_count = lf.select(pl.len()).collect().item()
+print(f"✅ Created {local_filename} with {row_count} rows.")
 
 # --- 3. UPLOAD ---
 print(f"☁️  Uploading to Azure...")
 with open(local_filename, "rb") as data:
-    data_client.upload_blob(name="final_cdc_export.csv", data=data, overwrite=True)
+    data_client.upload_blob(
+        name="final_cdc_export.csv",
+        data=data,
+        overwrite=True,
+        length=os.path.getsize(local_filename),
+        max_concurrency=TRANSFER_CONCURRENCY
+    )
 
 print("✅ Success!")
\ No newline at end of file
@@ -1,29 +1,157 @@
 import os
 import io
 import polars as pl
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
 # --- MODULE IMPORTS ---
-from models import LabResult 
+from models import LabResult, _ALLOWED_RESULTS
+from pipeline.azure_clients import make_blob_service_client, delete_blobs_batched, TRANSFER_CONCURRENCY
 from pydantic import ValidationError
 
 # --- CONFIGURATION ---
 load_dotenv()
 ACCOUNT_NAME = os.getenv("AZURE_STORAGE_ACCOUNT")
 ACCOUNT_URL = f"https://{ACCOUNT_NAME}.blob.core.windows.net"
+# Landing files downloaded and validated at the same time
+INGEST_WORKERS = 8
+# Partitions merged and rewritten at the same time
+PARTITION_WORKERS = 8
+# Rows per parquet row group; each group carries its own sample_id min/max statistics
+PARQUET_ROW_GROUP_SIZE = 100_000
 
 print(f"🔌 Connecting to {ACCOUNT_NAME}...")
 credential = DefaultAzureCredential()
-blob_service = BlobServiceClient(ACCOUNT_URL, credential=credential)
+blob_service = make_blob_service_client(PARTITION_WORKERS, account_url=ACCOUNT_URL, credential=credential)
 
 landing_client = blob_service.get_container_client("landing-zone")
 quarantine_client = blob_service.get_container_client("quarantine")
 data_client = blob_service.get_container_client("data")
 logs_client = blob_service.get_container_client("logs")
 
+# Column types of a validated LabResult row (matches pl.DataFrame of model_dump() dicts)
+VALID_SCHEMA = {"sample_id": pl.Utf8, "test_date": pl.Date, "result": pl.Utf8, "viral_load": pl.Int64}
+
+def _split_valid_rows(df, source_file):
+    """Validate a batch of string columns; returns (valid_df, error_df).
+
+    Rows in the canonical shape (ISO date, plain integer, allowed result code) are
+    validated with column expressions. Everything else still goes through LabResult,
+    so the accepted values and error messages are unchanged.
+    """
+    df = df.with_row_index("__row")
+    
+    if all(col in df.columns for col in VALID_SCHEMA):
+        fast = df.select(
+            "__row",
+            pl.col("sample_id"),
+            pl.when(pl.col("test_date").str.contains(r"^\d{4}-\d{2}-\d{2}$"))
+              .then(pl.col("test_date").str.to_date("%Y-%m-%d", strict=False))
+              .alias("test_date"),
+            pl.col("result"),
+            pl.when(pl.col("viral_load").str.contains(r"^-?\d{1,18}$"))
+              .then(pl.col("viral_load").cast(pl.Int64, strict=False))
+              .alias("viral_load"),
+        )
+        fast_ok = fast.select(
+            pl.col("sample_id").is_not_null()
+            & pl.col("test_date").is_not_null()
+            & pl.col("result").is_in(list(_ALLOWED_RESULTS))
+            & pl.col("viral_load").is_not_null()
+        ).to_series().fill_null(False)
+        fast_valid = fast.filter(fast_ok)
+        remaining = df.filter(~fast_ok)
+    else:
+        fast_valid = pl.DataFrame(schema={"__row": pl.UInt32, **VALID_SCHEMA})
+        remaining = df
+    
+    # Slow path: the few rows that are unusual or invalid get the full model
+    slow_valid = []
+    error_rows = []
+    for row in remaining.to_dicts():
+        row_index = row.pop("__row")
+        try:
+            slow_valid.append({"__row": row_index, **LabResult(**row).model_dump()})
+        except ValidationError as e:
+            row['pipeline_error'] = str(e)
+            row['source_file'] = source_file
+            error_rows.append(row)
+    
+    # Keep the file's row order so later de-duplication still keeps the last occurrence
+    valid_df = pl.concat([
+        fast_valid,
+        pl.DataFrame(slow_valid, schema={"__row": pl.UInt32, **VALID_SCHEMA}),
+    ]).sort("__row").drop("__row")
+    error_schema = {col: pl.Utf8 for col in [*remaining.columns[1:], "pipeline_error", "source_file"]}
+    error_df = pl.DataFrame(error_rows, schema=error_schema) if error_rows else None
+    return valid_df, error_df
+
+def _download_and_validate(blob):
+    """Download one landing CSV and split it into (valid_df, error_df)."""
+    print(f"📥 Downloading {blob.name}...")
+    blob_client = landing_client.get_blob_client(blob.name)
+    # Stream straight into one buffer instead of readall() bytes plus a BytesIO wrapper
+    csv_buffer = io.BytesIO()
+    blob_client.download_blob(max_concurrency=TRANSFER_CONCURRENCY).readinto(csv_buffer)
+    csv_buffer.seek(0)
+    
+    # Read CSV (Safely as Strings)
+    df = pl.read_csv(csv_buffer, infer_schema_length=0)
+    
+    # VALIDATE BATCH - Vectorized checks, Pydantic only for rows that need it
+    return _split_valid_rows(df, blob.name)
+
+def _upsert_partition(part_path, new_batch_df):
+    """Merge one partition's batch into its parquet file; returns (new_inserts, updates, log_line)."""
+    print(f"\n📁 Processing partition: {part_path}")
+    
+    # Latest row per sample_id wins within the batch, as it does against history
+    new_batch_df = new_batch_df.unique(subset=["sample_id"], keep="last", maintain_order=True)
+    print(f"   📦 {part_path}: new batch contains {len(new_batch_df)} record(s)")
+    
+    # Change extension to .parquet
+    blob_name = f"{part_path}/data.parquet"
+    blob_client = data_client.get_blob_client(blob_name)
+    
+    if blob_client.exists():
+        print(f"   Downloading history {blob_name} (Parquet)...")
+        history_buffer = io.BytesIO()
+        blob_client.download_blob(max_concurrency=TRANSFER_CONCURRENCY).readinto(history_buffer)
+        history_buffer.seek(0)
+        # Align column order - use new_batch_df column order as the standard;
+        # projecting at read time skips decoding any other columns
+        history_df = pl.read_parquet(history_buffer, columns=new_batch_df.columns)
+
+        # Upsert as one hashed is_in pass: drop replaced history rows, append the batch
+        replaced = history_df["sample_id"].is_in(new_batch_df["sample_id"])
+        final_df = pl.concat([history_df.filter(~replaced), new_batch_df])
+        
+        # Track changes: Find new vs updated records
+        updates = int(new_batch_df["sample_id"].is_in(history_df["sample_id"]).sum())
+        new_inserts = len(new_batch_df) - updates
+        log_line = f"   📁 {part_path}: ➕ {new_inserts} inserted, 🔄 {updates} updated"
+        print(f"   ➕ {part_path}: New records: {new_inserts}, 🔄 Updated: {updates}")
+        print(f"   💾 Uploading {blob_name} ({len(final_df)} total rows)...")
+    else:
+        print(f"   Creating new Parquet file {blob_name}...")
+        
+        # All rows in a new file are inserts
+        final_df = new_batch_df
+        updates = 0
+        new_inserts = len(new_batch_df)
+        log_line = f"   📁 {part_path}: ➕ {new_inserts} inserted (new partition)"
+    
+    # Write to buffer, then upload bytes.
+    # Sorted by sample_id so per-row-group min/max ranges stay tight for deletion pruning
+    output_stream = io.BytesIO()
+    final_df.sort("sample_id").write_parquet(
+        output_stream, compression="zstd", statistics=True, row_group_size=PARQUET_ROW_GROUP_SIZE
+    )
+    blob_client.upload_blob(output_stream.getvalue(), overwrite=True, max_concurrency=TRANSFER_CONCURRENCY)
+    return new_inserts, updates, log_line
+
 def process_pipeline():
     # Initialize execution log
     execution_start = datetime.now()
@@ -52,128 +180,92 @@ def process_pipeline():
     processing_log.append(f"📦 Found {len(blobs)} file(s) in landing zone")
     log_entry['files_processed'] = len(blobs)
 
-    all_valid_rows = []
-    all_error_rows = []
+    valid_frames = []
+    error_frames = []
+    processed_blobs = []
 
-    for blob in blobs:
-        print(f"📥 Downloading {blob.name}...")
+    # Overlap downloads and parsing across files
+    with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as executor:
+        futures = [executor.submit(_download_and_validate, blob) for blob in blobs]
         
-        blob_client = landing_client.get_blob_client(blob.name)
-        downloaded_bytes = blob_client.download_blob().readall()
-        
-        # Read CSV (Safely as Strings)
-        try:
-            df = pl.read_csv(io.BytesIO(downloaded_bytes), infer_schema_length=0)
-        except Exception as e:
-            print(f"❌ Failed to read CSV {blob.name}: {e}")
-            continue
-
-        # VALIDATE BATCH - Process all rows in memory for better performance
-        valid_count = 0
-        error_count = 0
-        rows = df.to_dicts()  # Convert to list of dicts once
-        for row in rows:
+        # Consume in listing order so the last file still wins on duplicate sample_ids
+        for blob, future in zip(blobs, futures):
             try:
-                valid_sample = LabResult(**row)
-                all_valid_rows.append(valid_sample.model_dump())
-                valid_count += 1
-            except ValidationError as e:
-                bad_row = row.copy()
-                bad_row['pipeline_error'] = str(e)
-                bad_row['source_file'] = blob.name
-                all_error_rows.append(bad_row)
-                error_count += 1
-        
-        print(f"✅ Processed {blob.name}: {valid_count} valid, {error_count} errors")
-        processing_log.append(f"✅ Processed {blob.name}: {valid_count} valid, {error_count} errors")
-        print(f"🗑️ Deleting {blob.name} from landing-zone...")
-        blob_client.delete_blob()
-
-    # --- 2. HANDLE BAD DATA ---
-    if all_error_rows:
-        error_df = pl.DataFrame(all_error_rows)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"quarantine_{timestamp}.csv"
-        
-        log_entry['rows_quarantined'] = len(all_error_rows)
-        print(f"⚠️ Uploading errors to {filename}...")
-        processing_log.append(f"⚠️ Quarantined {len(all_error_rows)} row(s) to {filename}")
-        quarantine_client.upload_blob(filename, error_df.write_csv(), overwrite=True)
-
-    if not all_valid_rows:
-        print("No valid data to upsert.")
-        processing_log.append("ℹ️ No valid data to process")
-        _save_execution_log(log_entry, processing_log)
-        return
+                valid_df, error_df = future.result()
+            except Exception as e:
+                print(f"❌ Failed to read CSV {blob.name}: {e}")
+                continue
+            
+            valid_count = len(valid_df)
+            error_count = len(error_df) if error_df is not None else 0
+            if valid_count:
+                valid_frames.append(valid_df)
+            if error_df is not None:
+                error_frames.append(error_df)
+            
+            print(f"✅ Processed {blob.name}: {valid_count} valid, {error_count} errors")
+            processing_log.append(f"✅ Processed {blob.name}: {valid_count} valid, {error_count} errors")
+            processed_blobs.append(blob.name)
 
-    # --- 3. HANDLE GOOD DATA (Upsert to Parquet) ---
-    full_df = pl.DataFrame(all_valid_rows)
+    # --- 2. HANDLE GOOD DATA (Upsert to Parquet) ---
+    if valid_frames:
+        full_df = pl.concat(valid_frames)
 
-    # Create Partition Path
-    full_df = full_df.with_columns(
-        partition_path = pl.format("year={}/week={}", 
-                                   pl.col("test_date").dt.year(), 
-                                   pl.col("test_date").dt.week())
-    )
+        # Create Partition Path
+        full_df = full_df.with_columns(
+            partition_path = pl.format("year={}/week={}", 
+                                       pl.col("test_date").dt.year(), 
+                                       pl.col("test_date").dt.week())
+        )
 
-    unique_partitions = full_df["partition_path"].unique().to_list()
-    print(f"\n📊 Processing {len(all_valid_rows)} valid records across {len(unique_partitions)} partition(s)...")
-    processing_log.append(f"📊 Processing {len(all_valid_rows)} valid record(s) across {len(unique_partitions)} partition(s)")
+        # Split in one grouped pass rather than re-filtering the whole batch per partition
+        partitions = full_df.partition_by("partition_path", as_dict=True, include_key=False)
+        print(f"\n📊 Processing {len(full_df)} valid records across {len(partitions)} partition(s)...")
+        processing_log.append(f"📊 Processing {len(full_df)} valid record(s) across {len(partitions)} partition(s)")
 
-    for part_path in unique_partitions:
-        print(f"\n📁 Processing partition: {part_path}")
-        
-        new_batch_df = full_df.filter(pl.col("partition_path") == part_path)
-        new_batch_df = new_batch_df.drop("partition_path")
-        print(f"   📦 New batch contains {len(new_batch_df)} record(s)")
-        
-        # Change extension to .parquet
-        blob_name = f"{part_path}/data.parquet"
-        blob_client = data_client.get_blob_client(blob_name)
+        # Landing files stay put on failure, so the next run retries the whole batch
+        try:
+            with ThreadPoolExecutor(max_workers=PARTITION_WORKERS) as executor:
+                part_paths = [part_path for (part_path,) in partitions]
+                results = list(executor.map(_upsert_partition, part_paths, partitions.values()))
+        except Exception as e:
+            print(f"❌ Error upserting partitions: {e}")
+            processing_log.append(f"❌ Error upserting partitions, landing files kept for the next run: {str(e)}")
+            _save_execution_log(log_entry, processing_log)
+            raise
         
-        if blob_client.exists():
-            print(f"   Downloading history (Parquet)...")
-            download_stream = blob_client.download_blob()
-            
-            # Fix 1: Typo 'download_stream' vs 'downloaded_stream'
-            history_df = pl.read_parquet(io.BytesIO(download_stream.readall()))
-            
-            # Align column order - use new_batch_df column order as the standard
-            history_df = history_df.select(new_batch_df.columns)
-
-            print("   Merging...")
-            combined_df = pl.concat([history_df, new_batch_df])
-            final_df = combined_df.unique(subset=["sample_id"], keep="last")
-            
-            # Track changes: Find new vs updated records
-            existing_ids = set(history_df["sample_id"].to_list())
-            new_batch_ids = set(new_batch_df["sample_id"].to_list())
-            new_inserts = len(new_batch_ids - existing_ids)
-            updates = len(new_batch_ids & existing_ids)
+        for new_inserts, updates, log_line in results:
             log_entry['rows_inserted'] += new_inserts
             log_entry['rows_updated'] += updates
-            
-            processing_log.append(f"   📁 {part_path}: ➕ {new_inserts} inserted, 🔄 {updates} updated")
-            print(f"   ➕ New records: {new_inserts}, 🔄 Updated: {updates}")
-            print(f"   💾 Uploading Parquet ({len(final_df)} total rows)...")
-            
-            # Fix 2: Write to buffer, then upload bytes
-            output_stream = io.BytesIO()
-            final_df.write_parquet(output_stream)
-            blob_client.upload_blob(output_stream.getvalue(), overwrite=True)
-            
-        else:
-            print(f"   Creating new Parquet file {blob_name}...")
-            
-            # All rows in a new file are inserts
-            log_entry['rows_inserted'] += len(new_batch_df)
-            
-            processing_log.append(f"   📁 {part_path}: ➕ {len(new_batch_df)} inserted (new partition)")
-            
-            # Write to buffer, then upload bytes
-            output_stream = io.BytesIO()
-            new_batch_df.write_parquet(output_stream)
-            blob_client.upload_blob(output_stream.getvalue(), overwrite=True)
+            processing_log.append(log_line)
+    else:
+        print("No valid data to upsert.")
+        processing_log.append("ℹ️ No valid data to process")
+
+    # --- 3. HANDLE BAD DATA ---
+    # Quarantined only after the upserts succeed, so a retried batch is not quarantined twice
+    if error_frames:
+        # Diagonal concat: files may carry different extra columns
+        error_df = pl.concat(error_frames, how="diagonal")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"quarantine_{timestamp}.csv"
+        
+        log_entry['rows_quarantined'] = len(error_df)
+        print(f"⚠️ Uploading errors to {filename}...")
+        processing_log.append(f"⚠️ Quarantined {len(error_df)} row(s) to {filename}")
+        # Write CSV bytes straight into a buffer rather than building a str to re-encode
+        csv_buffer = io.BytesIO()
+        error_df.write_csv(csv_buffer)
+        quarantine_client.upload_blob(filename, csv_buffer.getvalue(), overwrite=True)
+
+    # --- 4. CLEAR LANDING ZONE ---
+    if processed_blobs:
+        print(f"\n🗑️ Deleting {len(processed_blobs)} processed file(s) from landing-zone...")
+        try:
+            delete_blobs_batched(landing_client, processed_blobs)
+        except Exception as e:
+            print(f"❌ Error deleting processed landing files: {e}")
+            processing_log.append(f"❌ Error deleting processed landing files: {str(e)}")
 
     print("\n" + "="*60)
     print("✅ PIPELINE COMPLETE!")
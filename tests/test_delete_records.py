@@ -0,0 +1,58 @@
+import io
+from datetime import date
+from types import SimpleNamespace
+
+import polars as pl
+
+from pipeline.delete_records import _group_ids_by_partition, _read_parquet_tail, _stats_may_match
+
+def _deletion_request(csv_text):
+    """Parse a deletion-request CSV the way process_deletions does."""
+    df = pl.read_csv(io.BytesIO(csv_text.encode()), infer_schema_length=0)
+    return df.select(["sample_id", "test_date"]).with_columns(
+        pl.col("test_date").str.strptime(pl.Date, "%Y-%m-%d")
+    )
+
+def _parquet_bytes(sample_ids):
+    df = pl.DataFrame({"sample_id": sample_ids, "test_date": [date(2025, 12, 1)] * len(sample_ids)})
+    buffer = io.BytesIO()
+    df.write_parquet(buffer, statistics=True)
+    return buffer.getvalue()
+
+class _RangeBlob:
+    """Serves ranged reads of in-memory bytes like BlobClient.download_blob."""
+    def __init__(self, data):
+        self.data = data
+
+    def download_blob(self, offset, length):
+        chunk = self.data[offset:offset + length]
+        return SimpleNamespace(readall=lambda: chunk)
+
+def test_null_sample_id_is_dropped_before_grouping():
+    deletions_df = _deletion_request("sample_id,test_date\nS1,2025-12-01\n,2025-12-01\nS2,\n")
+
+    ids_by_partition = _group_ids_by_partition(deletions_df)
+
+    assert ids_by_partition == {"year=2025/week=49": {"S1"}}
+
+def test_footer_stats_with_null_request_row():
+    deletions_df = _deletion_request("sample_id,test_date\n,2025-12-01\nS5,2025-12-01\n")
+    tail = _parquet_bytes(["S1", "S3"])
+
+    ids_by_partition = _group_ids_by_partition(deletions_df)
+
+    assert not _stats_may_match(tail, ids_by_partition["year=2025/week=49"])
+    assert _stats_may_match(tail, {"S2"})
+
+def test_truncated_tail_falls_back_to_full_download():
+    tail = _parquet_bytes(["S1", "S3"])
+
+    assert _stats_may_match(b"", {"S5"})
+    assert _stats_may_match(tail[:5], {"S5"})
+    assert _stats_may_match(tail[:-1], {"S5"})
+
+def test_truncated_blob_tail_is_returned_unchanged():
+    truncated = _parquet_bytes(["S1"])[:5]
+
+    assert _read_parquet_tail(_RangeBlob(truncated), len(truncated)) == truncated
+    assert _read_parquet_tail(_RangeBlob(b""), 0) == b""